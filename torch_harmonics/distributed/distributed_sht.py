@@ -92,8 +92,8 @@ class DistributedRealSHT(nn.Module):
         self.comm_size_azimuth = azimuth_group_size()
         self.comm_rank_azimuth = azimuth_group_rank()
 
-        # apply cosine transform and flip them
-        tq = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
@@ -112,7 +112,7 @@ class DistributedRealSHT(nn.Module):
 
         # combine quadrature weights with the legendre weights
         weights = torch.from_numpy(w)
-        pct = precompute_legpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
+        pct = precompute_legpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, csphase=self.csphase)
         weights = torch.einsum('mlk,k->mlk', pct, weights)
 
         # we need to split in m, pad before:
@@ -236,8 +236,8 @@ class DistributedInverseRealSHT(nn.Module):
         self.comm_size_azimuth = azimuth_group_size()
         self.comm_rank_azimuth = azimuth_group_rank()
 
-        # apply cosine transform and flip them
-        t = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
@@ -255,7 +255,7 @@ class DistributedInverseRealSHT(nn.Module):
         self.mpad = mdist * self.comm_size_azimuth - self.mmax
 
         # compute legende polynomials
-        pct = precompute_legpoly(self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase)
+        pct = precompute_legpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, inverse=True, csphase=self.csphase)
 
         # split in m
         pct = F.pad(pct, [0, 0, 0, 0, 0, self.mpad], mode="constant")
@@ -385,8 +385,8 @@ class DistributedRealVectorSHT(nn.Module):
         self.comm_size_azimuth = azimuth_group_size()
         self.comm_rank_azimuth = azimuth_group_rank()
 
-        # apply cosine transform and flip them
-        tq = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
@@ -404,7 +404,7 @@ class DistributedRealVectorSHT(nn.Module):
         self.mpad = mdist * self.comm_size_azimuth - self.mmax
 
         weights = torch.from_numpy(w)
-        dpct = precompute_dlegpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
+        dpct = precompute_dlegpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, csphase=self.csphase)
 
         # combine integration weights, normalization factor in to one:
         l = torch.arange(0, self.lmax)
@@ -547,8 +547,8 @@ class DistributedInverseRealVectorSHT(nn.Module):
         self.comm_size_azimuth = azimuth_group_size()
         self.comm_rank_azimuth = azimuth_group_rank()
 
-        # apply cosine transform and flip them
-        t = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions
         self.mmax = mmax or self.nlon // 2 + 1
@@ -566,7 +566,7 @@ class DistributedInverseRealVectorSHT(nn.Module):
         self.mpad = mdist * self.comm_size_azimuth - self.mmax
 
         # compute legende polynomials
-        dpct = precompute_dlegpoly(self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase)
+        dpct = precompute_dlegpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, inverse=True, csphase=self.csphase)
 
         # split in m
         pct = F.pad(pct, [0, 0, 0, 0, 0, self.mpad], mode="constant")
@@ -29,6 +29,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
+import math
 import numpy as np
 import torch
 
@@ -36,7 +37,7 @@ def clm(l, m):
     """
     defines the normalization factor to orthonormalize the Spherical Harmonics
     """
-    return np.sqrt((2*l + 1) / 4 / np.pi) * np.sqrt(np.math.factorial(l-m) / np.math.factorial(l+m))
+    return np.sqrt((2*l + 1) / 4 / np.pi) * np.exp(0.5 * (math.lgamma(l-m+1) - math.lgamma(l+m+1)))
 
 
 def precompute_legpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=True):
@@ -44,6 +45,16 @@ def precompute_legpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=True)
     Computes the values of (-1)^m c^l_m P^l_m(\cos \theta) at the positions specified by x (theta)
     The resulting tensor has shape (mmax, lmax, len(x)).
     The Condon-Shortley Phase (-1)^m can be turned off optionally
+    """
+
+    return precompute_legpoly_from_cos(mmax, lmax, np.cos(t), norm=norm, inverse=inverse, csphase=csphase)
+
+
+def precompute_legpoly_from_cos(mmax, lmax, cost, norm="ortho", inverse=False, csphase=True):
+    r"""
+    Same as precompute_legpoly, but takes the values of \cos \theta directly. This avoids recomputing
+    them when the quadrature nodes are already given in x = \cos \theta, as is the case for the SHT grids.
+    The resulting tensor has shape (mmax, lmax, len(cost)).
 
     method of computation follows
     [1] Schaeffer, N.; Efficient spherical harmonic transforms aimed at pseudospectral numerical simulations, G3: Geochemistry, Geophysics, Geosystems.
@@ -54,11 +65,8 @@ def precompute_legpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=True)
 
     # compute the tensor P^m_n:
     nmax = max(mmax,lmax)
-    pct = np.zeros((nmax, nmax, len(t)), dtype=np.float64)
+    pct = np.zeros((nmax, nmax, len(cost)), dtype=np.float64)
 
-    sint = np.sin(t)
-    cost = np.cos(t)
-        
     norm_factor = 1. if norm == "ortho" else np.sqrt(4 * np.pi)
     norm_factor = 1. / norm_factor if inverse else norm_factor
 
@@ -71,23 +79,25 @@ def precompute_legpoly(mmax, lmax, t, norm="ortho", inverse=False, csphase=True)
         pct[l, l, :] = np.sqrt( (2*l + 1) * (1 + cost) * (1 - cost) / 2 / l ) * pct[l-1, l-1, :]
 
     # fill the remaining values on the upper triangle and multiply b
+    # the recursion only runs over l, all orders m < l-1 are updated at once
     for l in range(2, nmax):
-        for m in range(0, l-1):
-            pct[m, l, :] = cost * np.sqrt((2*l - 1) / (l - m) * (2*l + 1) / (l + m)) * pct[m, l-1, :] \
-                            - np.sqrt((l + m - 1) / (l - m) * (2*l + 1) / (2*l - 3) * (l - m - 1) / (l + m)) * pct[m, l-2, :]
+        m = np.arange(0, l-1).reshape(-1, 1)
+        a = np.sqrt((2*l - 1) / (l - m) * (2*l + 1) / (l + m))
+        b = np.sqrt((l + m - 1) / (l - m) * (2*l + 1) / (2*l - 3) * (l - m - 1) / (l + m))
+        pct[:l-1, l, :] = cost * a * pct[:l-1, l-1, :] - b * pct[:l-1, l-2, :]
 
     if norm == "schmidt":
-        for l in range(0, nmax):
-            if inverse:
-                pct[:, l, : ] = pct[:, l, : ] * np.sqrt(2*l + 1)
-            else:
-                pct[:, l, : ] = pct[:, l, : ] / np.sqrt(2*l + 1)
+        l = np.arange(0, nmax).reshape(-1, 1)
+        if inverse:
+            pct = pct * np.sqrt(2*l + 1)
+        else:
+            pct = pct / np.sqrt(2*l + 1)
 
-    pct = pct[:mmax, :lmax]
+    # truncate and copy into a contiguous array, so that the contractions read unit-stride memory
+    pct = np.ascontiguousarray(pct[:mmax, :lmax])
 
     if csphase:
-        for m in range(1, mmax, 2):
-            pct[m] *= -1
+        pct[1::2] *= -1
 
     return torch.from_numpy(pct)
 
@@ -97,14 +107,23 @@ def precompute_dlegpoly(mmax, lmax, x, norm="ortho", inverse=False, csphase=True
     at the positions specified by x (theta), as well as $\frac{1}{\sin \theta} P^m_l(\cos \theta)$,
     needed for the computation of the vector spherical harmonics. The resulting tensor has shape
     (2, mmax, lmax, len(x)).
+    """
+
+    return precompute_dlegpoly_from_cos(mmax, lmax, np.cos(x), norm=norm, inverse=inverse, csphase=csphase)
+
+
+def precompute_dlegpoly_from_cos(mmax, lmax, cost, norm="ortho", inverse=False, csphase=True):
+    r"""
+    Same as precompute_dlegpoly, but takes the values of \cos \theta directly, analogous to
+    precompute_legpoly_from_cos. The resulting tensor has shape (2, mmax, lmax, len(cost)).
 
     computation follows
     [2] Wang, B., Wang, L., Xie, Z.; Accurate calculation of spherical and vector spherical harmonic expansions via spectral element grids; Adv Comput Math.
     """
 
-    pct = precompute_legpoly(mmax+1, lmax+1, x, norm=norm, inverse=inverse, csphase=False)
+    pct = precompute_legpoly_from_cos(mmax+1, lmax+1, cost, norm=norm, inverse=inverse, csphase=False)
 
-    dpct = torch.zeros((2, mmax, lmax, len(x)), dtype=torch.float64)
+    dpct = torch.zeros((2, mmax, lmax, len(cost)), dtype=torch.float64)
 
     # fill the derivative terms wrt theta
     for l in range(0, lmax):
@@ -82,15 +82,15 @@ class RealSHT(nn.Module):
         else:
             raise(ValueError("Unknown quadrature mode"))
 
-        # apply cosine transform and flip them
-        tq = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions 
         self.mmax = mmax or self.nlon // 2 + 1
 
         # combine quadrature weights with the legendre weights
         weights = torch.from_numpy(w)
-        pct = precompute_legpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
+        pct = precompute_legpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, csphase=self.csphase)
         weights = torch.einsum('mlk,k->mlk', pct, weights)
 
         # remember quadrature weights
@@ -113,16 +113,9 @@ class RealSHT(nn.Module):
         # do the Legendre-Gauss quadrature
         x = torch.view_as_real(x)
         
-        # distributed contraction: fork
-        out_shape = list(x.size())
-        out_shape[-3] = self.lmax
-        out_shape[-2] = self.mmax
-        xout = torch.zeros(out_shape, dtype=x.dtype, device=x.device)
-        
-        # contraction
-        xout[..., 0] = torch.einsum('...km,mlk->...lm', x[..., :self.mmax, 0], self.weights.to(x.dtype) )
-        xout[..., 1] = torch.einsum('...km,mlk->...lm', x[..., :self.mmax, 1], self.weights.to(x.dtype) )
-        x = torch.view_as_complex(xout)
+        # contraction of real and imaginary part in a single batched matmul over m
+        xout = torch.einsum('...kmc,mlk->...lmc', x[..., :self.mmax, :], self.weights.to(x.dtype) )
+        x = torch.view_as_complex(xout.contiguous())
         
         return x
 
@@ -160,13 +153,13 @@ class InverseRealSHT(nn.Module):
         else:
             raise(ValueError("Unknown quadrature mode"))
 
-        # apply cosine transform and flip them
-        t = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions 
         self.mmax = mmax or self.nlon // 2 + 1
 
-        pct = precompute_legpoly(self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase)
+        pct = precompute_legpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, inverse=True, csphase=self.csphase)
 
         # register buffer
         self.register_buffer('pct', pct, persistent=False)
@@ -185,12 +178,11 @@ class InverseRealSHT(nn.Module):
         # Evaluate associated Legendre functions on the output nodes
         x = torch.view_as_real(x)
         
-        rl = torch.einsum('...lm, mlk->...km', x[..., 0], self.pct.to(x.dtype) )
-        im = torch.einsum('...lm, mlk->...km', x[..., 1], self.pct.to(x.dtype) )
-        xs = torch.stack((rl, im), -1)
+        # contraction of real and imaginary part in a single batched matmul over m
+        xs = torch.einsum('...lmc, mlk->...kmc', x, self.pct.to(x.dtype) )
 
         # apply the inverse (real) FFT
-        x = torch.view_as_complex(xs)
+        x = torch.view_as_complex(xs.contiguous())
         x = torch.fft.irfft(x, n=self.nlon, dim=-1, norm="forward")
 
         return x
@@ -238,14 +230,14 @@ class RealVectorSHT(nn.Module):
         else:
             raise(ValueError("Unknown quadrature mode"))
 
-        # apply cosine transform and flip them
-        tq = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions 
         self.mmax = mmax or self.nlon // 2 + 1
 
         weights = torch.from_numpy(w)
-        dpct = precompute_dlegpoly(self.mmax, self.lmax, tq, norm=self.norm, csphase=self.csphase)
+        dpct = precompute_dlegpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, csphase=self.csphase)
         
         # combine integration weights, normalization factor in to one:
         l = torch.arange(0, self.lmax)
@@ -331,13 +323,13 @@ class InverseRealVectorSHT(nn.Module):
         else:
             raise(ValueError("Unknown quadrature mode"))
 
-        # apply cosine transform and flip them
-        t = np.flip(np.arccos(cost))
+        # flip the nodes, the legendre polynomials are evaluated on x = cos(theta) directly
+        cost = np.flip(cost)
 
         # determine the dimensions 
         self.mmax = mmax or self.nlon // 2 + 1
 
-        dpct = precompute_dlegpoly(self.mmax, self.lmax, t, norm=self.norm, inverse=True, csphase=self.csphase)
+        dpct = precompute_dlegpoly_from_cos(self.mmax, self.lmax, cost, norm=self.norm, inverse=True, csphase=self.csphase)
 
         # register weights
         self.register_buffer('dpct', dpct, persistent=False)